@@ -6,27 +6,59 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
+from reportlab.lib.utils import ImageReader
 import io
 import math
+import bisect
+import functools
 import json
 import os
-from datetime import datetime
+import re
+import sys
+import time
+import uuid
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from datetime import datetime, date
 from PIL import Image as PILImage
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 
 # ==========================================
 # 0. Global Configuration
 # ==========================================
 COST_HISTORY_FILE = 'costing_history.json'
 YIELD_HISTORY_FILE = 'yield_history.json'
+RATE_TABLE_FILE = 'rate_tables.json'
 LOGO_FILE = 'logo.png' 
+COMPANY_NAME = "Sai Precision Tool Industries"
 PASSWORD = "Akash@123" # CHANGE THIS PASSWORD
 
+# --- Background PDF Rendering ---
+PDF_RENDER_WORKERS = 2
+PDF_POLL_INTERVAL = 0.5     # seconds between progress refreshes in the UI
+PDF_COMPACT_OUTPUT = True   # compressed streams, print-size logo, header/footer as form XObjects
+LOGO_PRINT_DPI = 150
+LOGO_JPEG_QUALITY = 85
+
+# --- Shared Quote Cache ---
+QUOTE_CACHE_MAX_BYTES = 64 * 1024 * 1024   # rendered PDFs, across all sessions
+QUOTE_CACHE_TTL = 60 * 60                  # seconds
+COMPONENT_INPUT_KEYS = ['name', 'stack_height', 'single_lam_weight_g', 'rivet_unit_cost', 'rivet_count',
+                        'rivet_manpower_cost', 'pressing_cost', 'opt_name', 'opt_cost']
+
+# --- Session Memory ---
+SESSION_STATE_MAX_BYTES = 4 * 1024 * 1024  # per-session cap; adding components is blocked above it
+SESSION_GAUGE_TTL = 60 * 60                # seconds before an idle session drops off the admin gauge
+
 # --- Costing Defaults ---
 DEFAULTS = {
     'rm_rate': 92.0, 'scrap_rate': 32.0, 'stroke_rate': 0.50,
     'packing_rate': 2.0, 'transport_rate': 3.0,
     'yield_pct': 31.97, 'weight_per_stroke_g': 25.0,
     'sheet_thickness': 0.5, 'tool_ref_name': "AL-102517A Combo",
+    'material_grade': "CRNGO",
     'tool_maint_rate': 0.03,
     'inventory_pct': 2.0, 'rejection_pct': 2.0, 'overhead_pct': 20.0, 'profit_pct': 12.0,
     'comp_stack_height': 33.0, 'comp_weight': 13.14,
@@ -55,11 +87,15 @@ def load_history_file(filename):
 def save_history_file(filename, history_data):
     with open(filename, 'w') as f: json.dump(history_data, f, indent=4)
 
+def new_history_id():
+    # Microsecond timestamp plus a random suffix: saves from concurrent sessions can share a second
+    return f"{datetime.now():%Y%m%d%H%M%S%f}-{uuid.uuid4().hex[:6]}"
+
 # --- Costing Specific Helpers ---
 def save_cost_state(common_inputs, components_state_list):
     history = load_history_file(COST_HISTORY_FILE)
     entry = {
-        "id": datetime.now().strftime("%Y%m%d%H%M%S"),
+        "id": new_history_id(),
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M"),
         "tool_name": common_inputs['tool_ref_name'],
         "common_inputs": common_inputs,
@@ -78,7 +114,7 @@ def delete_cost_history_entry(entry_id):
 def save_yield_state(name, global_inputs, components_list):
     history = load_history_file(YIELD_HISTORY_FILE)
     entry = {
-        "id": datetime.now().strftime("%Y%m%d%H%M%S"),
+        "id": new_history_id(),
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M"),
         "name": name,
         "global_inputs": global_inputs,
@@ -93,6 +129,210 @@ def delete_yield_history_entry(entry_id):
     history = [h for h in history if h['id'] != entry_id]
     save_history_file(YIELD_HISTORY_FILE, history)
 
+# --- Shared Quote Cache ---
+def normalize_quote_value(v):
+    if isinstance(v, bool): return v
+    if isinstance(v, (int, float)): return round(float(v), 9)
+    if isinstance(v, str): return v.strip()
+    return v
+
+def quote_key(common_inputs, components):
+    # Canonical hash of the inputs that determine a quote; derived fields on components are ignored
+    payload = {
+        'common': {k: normalize_quote_value(v) for k, v in common_inputs.items()},
+        'components': [{k: normalize_quote_value(c.get(k)) for k in COMPONENT_INPUT_KEYS} for c in components],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+def cache_entry_size(value):
+    if isinstance(value, (bytes, bytearray)): return len(value)
+    return len(json.dumps(value, default=str))
+
+class QuoteCache:
+    # Process-wide LRU keyed by (quote_key, artifact), bounded by total size in bytes and entry age
+    def __init__(self, max_bytes=QUOTE_CACHE_MAX_BYTES, ttl=QUOTE_CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # (key, artifact) -> (value, size, expires_at)
+        self._users = {}  # (key, artifact) -> sessions already counted for that entry
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+        self.artifact_stats = {}
+        self.cleared_at = None
+
+    def _count(self, artifact, outcome):
+        self.stats[outcome] += 1
+        per = self.artifact_stats.setdefault(artifact, {'hits': 0, 'misses': 0})
+        per[outcome] += 1
+
+    def get(self, key, artifact, session_id=None):
+        # With a session_id, only that session's first lookup of an entry is counted, so reruns
+        # re-reading the same quote don't pass for reuse across sessions
+        with self._lock:
+            entry = self._entries.get((key, artifact))
+            if entry is not None and entry[2] < time.monotonic():
+                self._drop((key, artifact))
+                self.stats['expirations'] += 1
+                entry = None
+            if entry is None:
+                self._count(artifact, 'misses')
+                return None
+            self._entries.move_to_end((key, artifact))
+            users = self._users.setdefault((key, artifact), set())
+            if session_id is None or session_id not in users:
+                self._count(artifact, 'hits')
+                if session_id is not None: users.add(session_id)
+            return entry[0]
+
+    def put(self, key, artifact, value, sessions=()):
+        # sessions: who produced the value; their later reads are not counted as hits
+        size = cache_entry_size(value)
+        if size > self.max_bytes: return
+        with self._lock:
+            if (key, artifact) in self._entries: self._drop((key, artifact))
+            self._purge_expired()
+            self._entries[(key, artifact)] = (value, size, time.monotonic() + self.ttl)
+            self._users[(key, artifact)] = set(sessions)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.stats['evictions'] += 1
+
+    def _drop(self, entry_key):
+        self.bytes -= self._entries.pop(entry_key)[1]
+        self._users.pop(entry_key, None)
+
+    def _purge_expired(self):
+        # Hits move entries to the back without extending their TTL, so scan them all
+        now = time.monotonic()
+        for entry_key in [k for k, e in self._entries.items() if e[2] < now]:
+            self._drop(entry_key)
+            self.stats['expirations'] += 1
+
+    def clear(self):
+        # Drops entries and starts the counters over, so the admin page reflects the cache since clearing
+        with self._lock:
+            self._entries.clear()
+            self._users.clear()
+            self.bytes = 0
+            self.stats = {k: 0 for k in self.stats}
+            self.artifact_stats = {}
+            self.cleared_at = datetime.now()
+
+    def snapshot(self):
+        with self._lock:
+            self._purge_expired()
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {**self.stats, 'entries': len(self._entries), 'bytes': self.bytes,
+                    'hit_rate': self.stats['hits'] / lookups if lookups else 0.0,
+                    'artifacts': {a: dict(v) for a, v in self.artifact_stats.items()},
+                    'cleared_at': self.cleared_at}
+
+@st.cache_resource
+def get_quote_cache():
+    return QuoteCache()
+
+# --- Session State Compaction ---
+# Per-component widget keys: cost page '<prefix>_<idx>', yield page 'y_<prefix>_<idx>' and
+# 'y_s_<prefix>_<idx>_<slot>'. Anything past the live component/slot count is garbage.
+# Button keys are only ever deleted, since Streamlit refuses assignments to them.
+COST_WIDGET_PREFIXES = ['name', 'ht', 'wt', 'rc', 'rn', 'rm', 'pr', 'on', 'oc']
+YIELD_WIDGET_PREFIXES = ['y_n', 'y_outer', 'y_num_slots']
+YIELD_SLOT_PREFIXES = ['y_s_area', 'y_s_cnt']
+COST_KEY_RE = re.compile(r'^(%s|del)_(\d+)$' % '|'.join(COST_WIDGET_PREFIXES))
+YIELD_KEY_RE = re.compile(r'^(%s|y_del)_(\d+)$' % '|'.join(YIELD_WIDGET_PREFIXES))
+YIELD_SLOT_KEY_RE = re.compile(r'^(%s)_(\d+)_(\d+)$' % '|'.join(YIELD_SLOT_PREFIXES))
+
+class ComponentRef:
+    # One row of the cost page's component list; field values live in the widget keys
+    __slots__ = ('id', 'name')
+
+    def __init__(self, id, name):
+        self.id = id
+        self.name = name
+
+def shift_indexed_keys(prefixes, removed_idx, count, slot_counts=None):
+    # Move '<prefix>_<j>' down to '<prefix>_<j-1>' for j > removed_idx, then drop the last index.
+    # Must run before the widgets are created (i.e. from a callback).
+    ss = st.session_state
+    for j in range(removed_idx + 1, count):
+        for p in prefixes:
+            if f"{p}_{j}" in ss: ss[f"{p}_{j-1}"] = ss[f"{p}_{j}"]
+            elif f"{p}_{j-1}" in ss: del ss[f"{p}_{j-1}"]
+        if slot_counts is not None:
+            for sp in YIELD_SLOT_PREFIXES:
+                for k in [k for k in ss.keys() if k.startswith(f"{sp}_{j-1}_")]: del ss[k]
+                for s_idx in range(slot_counts[j]):
+                    if f"{sp}_{j}_{s_idx}" in ss: ss[f"{sp}_{j-1}_{s_idx}"] = ss[f"{sp}_{j}_{s_idx}"]
+    for p in prefixes:
+        if f"{p}_{count-1}" in ss: del ss[f"{p}_{count-1}"]
+
+def gc_orphaned_widget_keys():
+    ss = st.session_state
+    n_cost = len(ss.get('components', []))
+    yield_comps = ss.get('yield_comps', [])
+    orphans = []
+    for k in list(ss.keys()):
+        m = COST_KEY_RE.match(k)
+        if m and int(m.group(2)) >= n_cost: orphans.append(k); continue
+        m = YIELD_KEY_RE.match(k)
+        if m and int(m.group(2)) >= len(yield_comps): orphans.append(k); continue
+        m = YIELD_SLOT_KEY_RE.match(k)
+        if m:
+            idx, s_idx = int(m.group(2)), int(m.group(3))
+            if idx >= len(yield_comps) or s_idx >= len(yield_comps[idx].get('slots', [])): orphans.append(k)
+    for k in orphans: del ss[k]
+    return len(orphans)
+
+def deep_sizeof(obj, seen=None):
+    seen = set() if seen is None else seen
+    if id(obj) in seen: return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict): size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)): size += sum(deep_sizeof(v, seen) for v in obj)
+    elif hasattr(obj, '__slots__'): size += sum(deep_sizeof(getattr(obj, a), seen) for a in obj.__slots__ if hasattr(obj, a))
+    return size
+
+def session_state_bytes():
+    return sum(deep_sizeof(k) + deep_sizeof(v) for k, v in st.session_state.items())
+
+class SessionGauge:
+    # Process-wide record of each session's state size, shown on the admin page
+    def __init__(self, ttl=SESSION_GAUGE_TTL):
+        self.ttl = ttl
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def record(self, session_id, size, keys, collected):
+        with self._lock:
+            prev = self._sessions.get(session_id, {})
+            self._sessions[session_id] = {'bytes': size, 'keys': keys, 'peak_bytes': max(size, prev.get('peak_bytes', 0)),
+                                          'collected': prev.get('collected', 0) + collected, 'seen': time.monotonic()}
+
+    def snapshot(self):
+        with self._lock:
+            now = time.monotonic()
+            for sid in [sid for sid, v in self._sessions.items() if now - v['seen'] > self.ttl]: del self._sessions[sid]
+            return {sid: dict(v) for sid, v in self._sessions.items()}
+
+@st.cache_resource
+def get_session_gauge():
+    return SessionGauge()
+
+def compact_session_state():
+    # Runs once per rerun: collect orphaned widget keys, then measure and record the session
+    collected = gc_orphaned_widget_keys()
+    size = session_state_bytes()
+    ctx = get_script_run_ctx()
+    if ctx is not None: get_session_gauge().record(ctx.session_id, size, len(st.session_state), collected)
+    st.session_state['_state_bytes'] = size
+    return size
+
+def session_over_cap():
+    return st.session_state.get('_state_bytes', 0) > SESSION_STATE_MAX_BYTES
+
 def lbl(label, key, default_ref_key=None, defaults_dict=DEFAULTS):
     target_val = defaults_dict.get(default_ref_key)
     current_val = st.session_state.get(key)
@@ -163,32 +403,256 @@ def calculate_component_cost(common_data, comp_input, packing_rate, transport_ra
     c['pack_trans_total'] = c['packing_cost'] + c['transport_cost']
     return c
 
+def cost_component(common_inputs, comp_input):
+    common_data = calculate_common_rates(common_inputs)
+    return calculate_component_cost(common_data, comp_input, common_inputs['packing_rate'],
+                                    common_inputs['transport_rate'], common_inputs['sheet_thickness'])
+
+# --- Goal Seek ---
+# final_stack_cost is affine in a transformed variable u for every input below:
+#   'linear'     u = x          (rates, percentages, per-stack adders)
+#   'reciprocal' u = 1 / x      (yield via gross weight, thickness via lams per stack)
+#   'strokes'    u = ceil(1000 / x), an integer step
+#   'integer'    u = x, restricted to whole numbers
+# so two model evaluations give the exact line, which is then inverted for the target.
+GOAL_SEEK_INPUTS = {
+    'rm_rate':             ('common', 'linear', "RM Rate"),
+    'scrap_rate':          ('common', 'linear', "Scrap Rate"),
+    'stroke_rate':         ('common', 'linear', "Stroke Rate"),
+    'packing_rate':        ('common', 'linear', "Packing Cost"),
+    'transport_rate':      ('common', 'linear', "Transport Cost"),
+    'inventory_pct':       ('common', 'linear', "Inventory (%)"),
+    'rejection_pct':       ('common', 'linear', "Rejection (%)"),
+    'overhead_pct':        ('common', 'linear', "Overhead (%)"),
+    'profit_pct':          ('common', 'linear', "Profit (%)"),
+    'tool_maint_rate':     ('common', 'linear', "Tool Maint (Rs/Stroke)"),
+    'yield_pct':           ('common', 'reciprocal', "Yield (%)"),
+    'sheet_thickness':     ('common', 'reciprocal', "Sheet Thickness (mm)"),
+    'weight_per_stroke_g': ('common', 'strokes', "Wt/Stroke (g)"),
+    'stack_height':        ('component', 'linear', "Stack Height (mm)"),
+    'single_lam_weight_g': ('component', 'linear', "Single Lam Wt (g)"),
+    'rivet_unit_cost':     ('component', 'linear', "Rivet Cost (Rs)"),
+    'rivet_manpower_cost': ('component', 'linear', "Manpower (Rs)"),
+    'pressing_cost':       ('component', 'linear', "Pressing (Rs)"),
+    'opt_cost':            ('component', 'linear', "Optional Cost (Rs)"),
+    'rivet_count':         ('component', 'integer', "Rivet Count"),
+}
+GOAL_SEEK_BOUNDS = {'yield_pct': (0.0, 100.0)}  # everything else must stay >= 0
+
+def strokes_to_weight(strokes):
+    # Smallest weight/stroke for which ceil(1000 / w) == strokes
+    w = 1000 / strokes
+    while math.ceil(1000 / w) > strokes: w = math.nextafter(w, math.inf)
+    return w
+
+def goal_seek_to_input(kind, u):
+    if kind == 'reciprocal': return 1 / u
+    if kind == 'strokes': return strokes_to_weight(u)
+    return u
+
+def goal_seek_probes(kind, current):
+    if kind in ('strokes', 'integer'): return 1, 2
+    if kind == 'reciprocal':
+        u0 = 1 / current if current and current > 0 else 1.0
+        return u0, 2 * u0
+    return 0.0, 1.0
+
+def goal_seek_case(common_inputs, comp_input, input_key, target):
+    scope, kind, _ = GOAL_SEEK_INPUTS[input_key]
+    src = common_inputs if scope == 'common' else comp_input
+
+    def cost_at(u):
+        x = goal_seek_to_input(kind, u)
+        if scope == 'common': return cost_component({**common_inputs, input_key: x}, comp_input)['final_stack_cost']
+        return cost_component(common_inputs, {**comp_input, input_key: x})['final_stack_cost']
+
+    u0, u1 = goal_seek_probes(kind, src.get(input_key))
+    f0, f1 = cost_at(u0), cost_at(u1)
+    slope = (f1 - f0) / (u1 - u0)
+    result = {'input': input_key, 'current': src.get(input_key), 'target': target,
+              'current_cost': cost_component(common_inputs, comp_input)['final_stack_cost'],
+              'value': None, 'achieved_cost': None, 'range': None, 'feasible': False, 'note': ''}
+    if math.isclose(slope, 0.0, abs_tol=1e-12):
+        result['note'] = "Cost does not depend on this input"
+        return result
+
+    u = u0 + (target - f0) / slope
+    if kind in ('strokes', 'integer'):
+        # Round towards the side where cost stays at or below the target
+        u = math.floor(u + 1e-9) if slope > 0 else math.ceil(u - 1e-9)
+        if kind == 'strokes' and u < 1:
+            result['note'] = "Target is below the cost of a single stroke per kg"
+            return result
+    elif kind == 'reciprocal' and u <= 0:
+        result['note'] = "No positive value reaches the target"
+        return result
+
+    x = goal_seek_to_input(kind, u)
+    lo, hi = GOAL_SEEK_BOUNDS.get(input_key, (0.0, math.inf))
+    result['value'] = x
+    result['achieved_cost'] = cost_at(u)
+    if kind == 'strokes':
+        result['range'] = (x, 1000 / (u - 1) if u > 1 else math.inf)
+    result['feasible'] = lo <= x <= hi
+    if not result['feasible']: result['note'] = f"Required value is outside {lo:g} to {hi:g}"
+    return result
+
+def goal_seek_batch(cases, input_key, target):
+    # cases: iterable of (common_inputs, comp_input) pairs
+    return [goal_seek_case(ci, comp, input_key, target) for ci, comp in cases]
+
+def history_goal_seek_cases(history_list):
+    for entry in history_list:
+        for comp in entry['components_data']:
+            yield entry['common_inputs'], comp
+
+# --- Material Rate Tables ---
+# Dated rate series per material grade and thickness. A record with thickness None applies to
+# every thickness of its grade and is used when no thickness-specific series exists.
+RATE_FIELDS = ['rm_rate', 'scrap_rate', 'stroke_rate']
+
+def rate_series_key(grade, thickness):
+    grade = str(grade).strip().upper()
+    if thickness is None or (isinstance(thickness, float) and math.isnan(thickness)): return f"{grade}|*"
+    return f"{grade}|{round(float(thickness), 3)}"
+
+def load_rate_table():
+    return load_history_file(RATE_TABLE_FILE)
+
+def add_rate_record(grade, thickness, effective_from, rates):
+    records = load_rate_table()
+    record = {'grade': str(grade).strip().upper(), 'thickness': thickness,
+              'effective_from': effective_from.isoformat(), **{f: rates[f] for f in RATE_FIELDS}}
+    # A new record for the same series and date replaces the old one
+    key = (rate_series_key(record['grade'], thickness), record['effective_from'])
+    records = [r for r in records if (rate_series_key(r['grade'], r.get('thickness')), r['effective_from']) != key]
+    records.append(record)
+    records.sort(key=lambda r: (r['grade'], r.get('thickness') is None, r.get('thickness') or 0, r['effective_from']))
+    save_history_file(RATE_TABLE_FILE, records)
+    return record
+
+class RateIndex:
+    # Per-series sorted effective dates; as_of() bisects for the last record on or before the date
+    def __init__(self, records):
+        series = {}
+        for r in sorted(records, key=lambda r: r['effective_from']):
+            series.setdefault(rate_series_key(r['grade'], r.get('thickness')), []).append(r)
+        self._records = series
+        self._dates = {k: [r['effective_from'] for r in v] for k, v in series.items()}
+
+    def as_of(self, grade, thickness, on_date):
+        # Parsed like resolve_rates_as_of does, so an unparseable date gets no rate on both paths
+        try: on_date = pd.Timestamp(on_date)
+        except (TypeError, ValueError): return None
+        if pd.isna(on_date): return None
+        on_date = on_date.date().isoformat()
+        for key in (rate_series_key(grade, thickness), rate_series_key(grade, None)):
+            dates = self._dates.get(key)
+            if not dates: continue
+            i = bisect.bisect_right(dates, on_date) - 1
+            if i >= 0: return self._records[key][i]
+        return None
+
+@functools.lru_cache(maxsize=1)
+def _rate_index(mtime):
+    return RateIndex(load_rate_table())
+
+def get_rate_index():
+    # Rebuilt only when the rate table file changes
+    return _rate_index(os.path.getmtime(RATE_TABLE_FILE) if os.path.exists(RATE_TABLE_FILE) else None)
+
+def resolve_rates_as_of(quotes, records=None):
+    # quotes: DataFrame with 'grade', 'thickness' and 'as_of' columns. Returns a copy with
+    # RATE_FIELDS and 'rate_effective_from' filled from the table (NaN where no rate applies),
+    # using one merge_asof per pass: exact thickness first, then grade-wide records.
+    records = load_rate_table() if records is None else records
+    out = quotes.copy()
+    for f in RATE_FIELDS: out[f] = float('nan')
+    out['rate_effective_from'] = pd.NaT
+    if not records or out.empty: return out
+
+    rates = pd.DataFrame(records)
+    if 'thickness' not in rates: rates['thickness'] = None
+    rates['series'] = [rate_series_key(g, t) for g, t in zip(rates['grade'], rates['thickness'])]
+    # Both merge keys in ns: date objects parse to datetime64[s] but ISO strings to [us]
+    rates['rate_effective_from'] = pd.to_datetime(rates['effective_from'], errors='coerce').astype('datetime64[ns]')
+    rates = rates.dropna(subset=['rate_effective_from']).sort_values('rate_effective_from')
+    rates = rates[['series', 'rate_effective_from'] + RATE_FIELDS]
+
+    # Quote keys go through rate_series_key too, so an int thickness (1) matches a table 1.0
+    thickness = pd.to_numeric(out['thickness'], errors='coerce')
+    as_of = pd.to_datetime(out['as_of'], errors='coerce').astype('datetime64[ns]')
+    left = pd.DataFrame({'_row': range(len(out)), 'as_of': as_of.values})
+    series_by_pass = [pd.Series([rate_series_key(g, t) for g, t in zip(out['grade'], thickness)]),
+                      pd.Series([rate_series_key(g, None) for g in out['grade']])]
+    dated = left['as_of'].notna().values  # unparseable dates get no rate rather than reaching merge_asof
+    for series in series_by_pass:
+        pending = out[RATE_FIELDS[0]].isna().values & dated
+        if not pending.any(): break
+        batch = left[pending].assign(series=series.values[pending]).sort_values('as_of')
+        matched = pd.merge_asof(batch, rates, left_on='as_of', right_on='rate_effective_from',
+                                by='series', direction='backward').dropna(subset=['rate_effective_from'])
+        cols = RATE_FIELDS + ['rate_effective_from']
+        for c in cols: out.iloc[matched['_row'].values, out.columns.get_loc(c)] = matched[c].values
+    return out
+
+def history_rate_quotes(history_list, as_of=None):
+    # One row per history entry, dated at its timestamp unless a fixed as_of is given
+    return pd.DataFrame({
+        'id': [h['id'] for h in history_list],
+        'grade': [h['common_inputs'].get('material_grade', DEFAULTS['material_grade']) for h in history_list],
+        'thickness': [h['common_inputs']['sheet_thickness'] for h in history_list],
+        'as_of': [as_of if as_of is not None else h['timestamp'][:10] for h in history_list],
+    })
+
+def reprice_history(history_list, as_of=None, records=None):
+    # Re-cost saved quotes with table rates: as of each quote's own date, or a fixed as_of
+    resolved = resolve_rates_as_of(history_rate_quotes(history_list, as_of), records)
+    rows = []
+    for entry, rates in zip(history_list, resolved.itertuples(index=False)):
+        ci = dict(entry['common_inputs'])
+        found = not pd.isna(rates.rm_rate)
+        if found: ci.update({f: float(getattr(rates, f)) for f in RATE_FIELDS})
+        for comp in entry['components_data']:
+            rows.append({'id': entry['id'], 'tool_name': entry['tool_name'], 'component': comp['name'],
+                         'as_of': rates.as_of, 'rate_effective_from': rates.rate_effective_from if found else None,
+                         'saved_cost': comp.get('final_stack_cost'),
+                         'repriced_cost': cost_component(ci, comp)['final_stack_cost'] if found else None})
+    return pd.DataFrame(rows)
+
 # ==========================================
 # 3. PDF Generation
 # ==========================================
 
+def get_logo_print_size(orig_w, orig_h):
+    aspect = orig_h / float(orig_w)
+    target_w = 2.0 * inch
+    target_h = target_w * aspect
+    if target_h > 1.2 * inch:
+        target_h = 1.2 * inch
+        target_w = target_h / aspect
+    return target_w, target_h
+
+def get_report_styles():
+    styles = getSampleStyleSheet()
+    company_style = ParagraphStyle('Company', parent=styles['Heading1'], alignment=TA_LEFT, fontSize=14, textColor=colors.black, spaceAfter=6)
+    report_title_style = ParagraphStyle('ReportTitle', parent=styles['Normal'], alignment=TA_LEFT, fontSize=12, textColor=colors.black, spaceAfter=20)
+    return company_style, report_title_style
+
 def get_header_elements(title_text):
     elements = []
     if os.path.exists(LOGO_FILE):
         try:
             pil_img = PILImage.open(LOGO_FILE)
-            orig_w, orig_h = pil_img.size
-            aspect = orig_h / float(orig_w)
-            target_w = 2.0 * inch
-            target_h = target_w * aspect
-            if target_h > 1.2 * inch:
-                target_h = 1.2 * inch
-                target_w = target_h / aspect
+            target_w, target_h = get_logo_print_size(*pil_img.size)
             im = Image(LOGO_FILE, width=target_w, height=target_h)
             im.hAlign = 'LEFT'
             elements.append(im)
             elements.append(Spacer(1, 12))
         except: pass 
 
-    styles = getSampleStyleSheet()
-    company_style = ParagraphStyle('Company', parent=styles['Heading1'], alignment=TA_LEFT, fontSize=14, textColor=colors.black, spaceAfter=6)
-    elements.append(Paragraph("Sai Precision Tool Industries", company_style))
-    report_title_style = ParagraphStyle('ReportTitle', parent=styles['Normal'], alignment=TA_LEFT, fontSize=12, textColor=colors.black, spaceAfter=20)
+    company_style, report_title_style = get_report_styles()
+    elements.append(Paragraph(COMPANY_NAME, company_style))
     elements.append(Paragraph(title_text, report_title_style))
     return elements
 
@@ -200,10 +664,90 @@ def on_page_footer(canvas, doc):
     canvas.drawRightString(A4[0]-30, 20, f"Page {doc.page}")
     canvas.restoreState()
 
-def create_detailed_pdf(common_data, components_data, common_inputs):
+# --- Compact Output ---
+@functools.lru_cache(maxsize=1)
+def get_compact_logo(mtime):
+    # Logo flattened on white, resampled once to its printed size and stored as JPEG,
+    # which ReportLab embeds as-is (DCTDecode) instead of re-encoding raw pixels; mtime keys the cache
+    pil_img = PILImage.open(LOGO_FILE)
+    target_w, target_h = get_logo_print_size(*pil_img.size)
+    px = (max(1, round(target_w / 72 * LOGO_PRINT_DPI)), max(1, round(target_h / 72 * LOGO_PRINT_DPI)))
+    pil_img = pil_img.convert('RGBA')
+    flat = PILImage.new('RGB', pil_img.size, (255, 255, 255))
+    flat.paste(pil_img, mask=pil_img.getchannel('A'))
+    if px[0] < flat.size[0]: flat = flat.resize(px, PILImage.LANCZOS)
+    out = io.BytesIO()
+    flat.save(out, format='JPEG', quality=LOGO_JPEG_QUALITY, optimize=True)
+    return out.getvalue(), target_w, target_h
+
+class CompactPageDecor:
+    # Header and static footer drawn once per document as form XObjects, stamped onto pages
+    HEADER_FORM = 'spti_header'
+    FOOTER_FORM = 'spti_footer'
+
+    def __init__(self, title_text, doc):
+        self.date_str = datetime.now().strftime("%d-%b-%Y %H:%M")
+        self.x = doc.leftMargin + 6  # SimpleDocTemplate frames pad 6pt on each side
+        self.top = doc.pagesize[1] - doc.topMargin - 6
+        self.logo = None
+        if os.path.exists(LOGO_FILE):
+            try: self.logo = get_compact_logo(os.path.getmtime(LOGO_FILE))
+            except: pass
+        company_style, report_title_style = get_report_styles()
+        avail_w = doc.pagesize[0] - doc.leftMargin - doc.rightMargin - 12
+        self.company = Paragraph(COMPANY_NAME, company_style)
+        self.title = Paragraph(title_text, report_title_style)
+        self.company_h = self.company.wrap(avail_w, self.top)[1]
+        self.title_h = self.title.wrap(avail_w, self.top)[1]
+        self.height = self.company_h + company_style.spaceAfter + self.title_h + report_title_style.spaceAfter
+        self.logo_gap = 12 + company_style.spaceBefore  # spaceBefore only applies below the logo
+        if self.logo: self.height += self.logo[2] + self.logo_gap
+
+    def _define_forms(self, canvas):
+        if canvas.hasForm(self.HEADER_FORM): return
+        canvas.beginForm(self.HEADER_FORM)
+        y = self.top
+        if self.logo:
+            data, w, h = self.logo
+            y -= h
+            canvas.drawImage(ImageReader(io.BytesIO(data)), self.x, y, width=w, height=h)
+            y -= self.logo_gap
+        y -= self.company_h
+        self.company.drawOn(canvas, self.x, y)
+        y -= self.company.style.spaceAfter + self.title_h
+        self.title.drawOn(canvas, self.x, y)
+        canvas.endForm()
+
+        canvas.beginForm(self.FOOTER_FORM)
+        canvas.setFont('Helvetica', 8)
+        canvas.drawString(30, 20, f"Generated on: {self.date_str}")
+        canvas.endForm()
+
+    def on_first_page(self, canvas, doc):
+        self._define_forms(canvas)
+        canvas.doForm(self.HEADER_FORM)
+        self.on_later_pages(canvas, doc)
+
+    def on_later_pages(self, canvas, doc):
+        self._define_forms(canvas)
+        canvas.saveState()
+        canvas.doForm(self.FOOTER_FORM)
+        canvas.setFont('Helvetica', 8)
+        canvas.drawRightString(A4[0]-30, 20, f"Page {doc.page}")
+        canvas.restoreState()
+
+def new_report(title_text, compact):
+    # Returns (buffer, doc, header elements, first-page callback, later-page callback)
     buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=40)
-    elements = get_header_elements(f"Detailed Costing Report: {common_inputs['tool_ref_name']}")
+    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=40,
+                            pageCompression=1 if compact else None)
+    if not compact:
+        return buffer, doc, get_header_elements(title_text), on_page_footer, on_page_footer
+    decor = CompactPageDecor(title_text, doc)
+    return buffer, doc, [Spacer(1, decor.height)], decor.on_first_page, decor.on_later_pages
+
+def create_detailed_pdf(common_data, components_data, common_inputs, progress_cb=None, compact=PDF_COMPACT_OUTPUT):
+    buffer, doc, elements, first_page, later_pages = new_report(f"Detailed Costing Report: {common_inputs['tool_ref_name']}", compact)
     styles = getSampleStyleSheet()
     
     pro_table_style = TableStyle([
@@ -269,14 +813,13 @@ def create_detailed_pdf(common_data, components_data, common_inputs):
         elements.append(t_comp)
         elements.append(Spacer(1, 15))
 
-    doc.build(elements, onFirstPage=on_page_footer, onLaterPages=on_page_footer)
+    if progress_cb: doc.setProgressCallBack(progress_cb)
+    doc.build(elements, onFirstPage=first_page, onLaterPages=later_pages)
     buffer.seek(0)
     return buffer
 
-def create_summary_pdf(common_data, components_data, common_inputs):
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=40)
-    elements = get_header_elements(f"Cost Summary: {common_inputs['tool_ref_name']}")
+def create_summary_pdf(common_data, components_data, common_inputs, progress_cb=None, compact=PDF_COMPACT_OUTPUT):
+    buffer, doc, elements, first_page, later_pages = new_report(f"Cost Summary: {common_inputs['tool_ref_name']}", compact)
     
     table_data = [["S. No.", "Description", "Value", "Unit"]]
     table_data.extend([
@@ -325,10 +868,113 @@ def create_summary_pdf(common_data, components_data, common_inputs):
     ]
     t.setStyle(TableStyle(base_style + row_styles))
     elements.append(t)
-    doc.build(elements, onFirstPage=on_page_footer, onLaterPages=on_page_footer)
+    if progress_cb: doc.setProgressCallBack(progress_cb)
+    doc.build(elements, onFirstPage=first_page, onLaterPages=later_pages)
     buffer.seek(0)
     return buffer
 
+PDF_BUILDERS = {'detailed': create_detailed_pdf, 'summary': create_summary_pdf}
+
+# --- Background Rendering ---
+class PdfRenderJob:
+    def __init__(self, key, kind):
+        self.key = key
+        self.kind = kind
+        self.progress = 0.0
+        self.future = None
+        self.sessions = set()  # sessions whose latest request for this kind is this job
+        self._total = 0
+
+    @classmethod
+    def finished(cls, key, kind, data):
+        job = cls(key, kind)
+        job.progress = 1.0
+        job.future = Future()
+        job.future.set_result(data)
+        return job
+
+    def on_progress(self, typ, value):
+        # ReportLab reports SIZE_EST once (flowable count) then PROGRESS per flowable laid out
+        if typ == 'SIZE_EST': self._total = value
+        elif typ == 'PROGRESS' and self._total: self.progress = min(value / self._total, 0.99)
+        elif typ == 'FINISHED': self.progress = 1.0
+
+    def done(self):
+        return self.future.done()
+
+# Process-wide pool rendering PDFs off the script thread. Identical in-flight requests share
+# one job; finished PDFs are served from the quote cache. A session's newer request supersedes
+# its older one, which is cancelled if it has not started and no other session still wants it.
+class PdfRenderService:
+    def __init__(self, cache, max_workers=PDF_RENDER_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pdf-render')
+        self._jobs = {}
+        self._latest = {}  # (session_id, kind) -> pending job last requested by that session
+        self._lock = threading.Lock()
+        self.cache = cache
+
+    def submit(self, kind, common_data, components_data, common_inputs, session_id=None):
+        key = quote_key(common_inputs, components_data)
+        artifact = f"pdf_{kind}"
+        with self._lock:
+            job = self._jobs.get((key, kind))
+            if job is None:
+                data = self.cache.get(key, artifact, session_id)
+                if data is not None: job = PdfRenderJob.finished(key, kind, data)
+            if job is None:
+                job = PdfRenderJob(key, kind)
+                job.future = self._executor.submit(self._render, job, common_data, components_data, common_inputs)
+                self._jobs[(key, kind)] = job
+            if session_id is not None: self._supersede(session_id, kind, job)
+            return job
+
+    def _supersede(self, session_id, kind, job):
+        previous = self._latest.get((session_id, kind))
+        if previous is not None and previous is not job:
+            previous.sessions.discard(session_id)
+            if not previous.sessions and previous.future.cancel():
+                self._jobs.pop((previous.key, previous.kind), None)
+        if job.done():
+            self._latest.pop((session_id, kind), None)
+        else:
+            job.sessions.add(session_id)
+            self._latest[(session_id, kind)] = job
+
+    def _render(self, job, common_data, components_data, common_inputs):
+        try:
+            buffer = PDF_BUILDERS[job.kind](common_data, components_data, common_inputs, progress_cb=job.on_progress)
+            data = buffer.getvalue()
+            with self._lock: sessions = set(job.sessions)
+            self.cache.put(job.key, f"pdf_{job.kind}", data, sessions)
+            job.progress = 1.0
+            return data
+        finally:
+            with self._lock:
+                self._jobs.pop((job.key, job.kind), None)
+                for session_id in job.sessions:
+                    if self._latest.get((session_id, job.kind)) is job: del self._latest[(session_id, job.kind)]
+
+@st.cache_resource
+def get_pdf_render_service():
+    return PdfRenderService(get_quote_cache())
+
+def render_pdf_download(job, label, file_name):
+    pending = not job.done()
+
+    @st.fragment(run_every=PDF_POLL_INTERVAL if pending else None)
+    def _slot():
+        if not job.done():
+            st.progress(job.progress, text=f"Rendering {file_name}...")
+            return
+        if job.future.cancelled(): return  # superseded by a newer request from this session
+        if pending: st.rerun()  # full rerun re-creates this slot without polling
+        if job.future.exception():
+            st.error(f"PDF rendering failed: {job.future.exception()}")
+            return
+        st.download_button(label, data=job.future.result(), file_name=file_name, mime="application/pdf")
+
+    _slot()
+
 # ==========================================
 # 4. Page: Cost Calculator
 # ==========================================
@@ -336,14 +982,16 @@ def page_cost_calculator():
     st.title("Component Cost Calculator")
     st.caption("Fields marked with 🔹 are currently set to System Defaults.")
 
-    if 'components' not in st.session_state: st.session_state.components = [{'id': 0, 'name': 'Stator'}]
+    if 'components' not in st.session_state: st.session_state.components = [ComponentRef(0, 'Stator')]
 
     if 'loaded_data' in st.session_state:
         ld = st.session_state['loaded_data']
         for k, v in ld['common_inputs'].items(): st.session_state[k] = v 
+        if 'material_grade' not in ld['common_inputs']: st.session_state['material_grade'] = DEFAULTS['material_grade']
+        st.session_state['rates_as_of'] = datetime.strptime(ld['timestamp'][:10], "%Y-%m-%d").date()
         st.session_state.components = [] 
         for idx, comp_data in enumerate(ld['components_data']):
-            st.session_state.components.append({'id': idx, 'name': comp_data['name']})
+            st.session_state.components.append(ComponentRef(idx, comp_data['name']))
             st.session_state[f"name_{idx}"] = comp_data['name']
             st.session_state[f"ht_{idx}"] = comp_data['stack_height']
             st.session_state[f"wt_{idx}"] = comp_data['single_lam_weight_g']
@@ -358,9 +1006,24 @@ def page_cost_calculator():
     def init_key(k, default):
         if k not in st.session_state: st.session_state[k] = default
 
+    def remove_component(idx):
+        shift_indexed_keys(COST_WIDGET_PREFIXES, idx, len(st.session_state.components))
+        st.session_state.components.pop(idx)
+        for j, ref in enumerate(st.session_state.components): ref.id = j
+
     for k in DEFAULTS.keys():
         if k.startswith('comp_'): continue
         init_key(k, DEFAULTS[k])
+    init_key('rates_as_of', date.today())
+
+    def apply_table_rates():
+        ss = st.session_state
+        record = get_rate_index().as_of(ss['material_grade'], ss['sheet_thickness'], ss['rates_as_of'])
+        if record is None:
+            st.toast(f"No {ss['material_grade']} rates on or before {ss['rates_as_of']:%d-%b-%Y}")
+            return
+        for f in RATE_FIELDS: ss[f] = float(record[f])
+        st.toast(f"Applied rates effective {record['effective_from']}")
 
     # --- SIDEBAR ---
     with st.sidebar:
@@ -377,6 +1040,9 @@ def page_cost_calculator():
                         st.rerun()
         st.divider()
         st.subheader("Global Rates")
+        material_grade = st.text_input(lbl("Material Grade", 'material_grade'), key='material_grade')
+        st.date_input("Rates as of", key='rates_as_of', format="DD/MM/YYYY")
+        st.button("📥 Apply Table Rates", on_click=apply_table_rates, help="Fill RM, scrap and stroke rates from the rate table")
         rm_rate = st.number_input(lbl("RM Rate", 'rm_rate'), key='rm_rate', step=1.0)
         scrap_rate = st.number_input(lbl("Scrap Rate", 'scrap_rate'), key='scrap_rate', step=1.0)
         stroke_rate = st.number_input(lbl("Stroke Rate", 'stroke_rate'), key='stroke_rate', step=0.05, format="%.2f")
@@ -402,7 +1068,7 @@ def page_cost_calculator():
             tool_maint_rate = c5.number_input(lbl("Tool Maint (Rs/Stroke)", 'tool_maint_rate'), key='tool_maint_rate', format="%.3f", step=0.01)
 
     common_inputs = {
-        'tool_ref_name': tool_ref_name, 'yield_pct': yield_pct, 'weight_per_stroke_g': weight_per_stroke_g,
+        'tool_ref_name': tool_ref_name, 'material_grade': material_grade, 'yield_pct': yield_pct, 'weight_per_stroke_g': weight_per_stroke_g,
         'sheet_thickness': sheet_thickness, 'tool_maint_rate': tool_maint_rate,
         'rm_rate': rm_rate, 'scrap_rate': scrap_rate, 'stroke_rate': stroke_rate,
         'packing_rate': packing_rate, 'transport_rate': transport_rate,
@@ -433,7 +1099,7 @@ def page_cost_calculator():
     stack_height_step = max(0.01, float(sheet_thickness))
 
     for idx, comp in enumerate(st.session_state.components):
-        init_key(f"name_{idx}", comp.get('name', 'Part'))
+        init_key(f"name_{idx}", comp.name or 'Part')
         init_key(f"ht_{idx}", DEFAULTS['comp_stack_height'])
         init_key(f"wt_{idx}", DEFAULTS['comp_weight'])
         init_key(f"rc_{idx}", DEFAULTS['comp_rivet_cost'])
@@ -471,9 +1137,7 @@ def page_cost_calculator():
             o3.info(f"Tool Maint (Auto): **₹ {maint_calc:.2f}**")
 
             if idx > 0:
-                if st.button("🗑️ Remove Component", key=f"del_{idx}"):
-                    st.session_state.components.pop(idx)
-                    st.rerun()
+                st.button("🗑️ Remove Component", key=f"del_{idx}", on_click=remove_component, args=(idx,))
 
             comp_inputs = {
                 'name': c_name, 'stack_height': c_height, 'single_lam_weight_g': c_weight, 
@@ -498,9 +1162,9 @@ def page_cost_calculator():
             st.session_state[f"pr_{new_id}"] = st.session_state.get(f"pr_{src_idx}", DEFAULTS['comp_press'])
             st.session_state[f"on_{new_id}"] = st.session_state.get(f"on_{src_idx}", DEFAULTS['comp_opt_name'])
             st.session_state[f"oc_{new_id}"] = st.session_state.get(f"oc_{src_idx}", DEFAULTS['comp_opt_cost'])
-        st.session_state.components.append({'id': new_id, 'name': f'Component {new_id + 1}'})
+        st.session_state.components.append(ComponentRef(new_id, f'Component {new_id + 1}'))
     
-    st.button("➕ Add Another Component", on_click=add_component)
+    st.button("➕ Add Another Component", on_click=add_component, disabled=session_over_cap())
     st.divider()
     
     # --- ACTIONS ---
@@ -510,11 +1174,14 @@ def page_cost_calculator():
         st.success(f"Saved: {saved_entry['tool_name']}")
         st.rerun()
 
-    detailed_pdf = create_detailed_pdf(common_data, all_components_data, common_inputs)
-    col_act2.download_button("📄 Download Detailed PDF", data=detailed_pdf, file_name=f"{tool_ref_name}_Detailed.pdf", mime="application/pdf")
-    
-    summary_pdf = create_summary_pdf(common_data, all_components_data, common_inputs)
-    col_act3.download_button("📑 Download Summary PDF", data=summary_pdf, file_name=f"{tool_ref_name}_Summary.pdf", mime="application/pdf")
+    pdf_service = get_pdf_render_service()
+    ctx = get_script_run_ctx()
+    session_id = ctx.session_id if ctx is not None else None
+    detailed_job = pdf_service.submit('detailed', common_data, all_components_data, common_inputs, session_id)
+    with col_act2: render_pdf_download(detailed_job, "📄 Download Detailed PDF", f"{tool_ref_name}_Detailed.pdf")
+
+    summary_job = pdf_service.submit('summary', common_data, all_components_data, common_inputs, session_id)
+    with col_act3: render_pdf_download(summary_job, "📑 Download Summary PDF", f"{tool_ref_name}_Summary.pdf")
 
     # --- PREVIEW ---
     st.subheader("📋 Full Cost Preview")
@@ -551,6 +1218,43 @@ def page_cost_calculator():
         }
         st.table(df_preview.style.format(format_dict))
 
+    # --- GOAL SEEK ---
+    st.subheader("🎯 Goal Seek")
+    with st.expander("Solve for the input that hits a target stack cost"):
+        # Solved only on submit: the "All history entries" scope reloads the history file each time
+        with st.form('goal_seek_form'):
+            g1, g2, g3 = st.columns([2, 1, 2])
+            gs_input = g1.selectbox("Input to solve", list(GOAL_SEEK_INPUTS.keys()), format_func=lambda k: GOAL_SEEK_INPUTS[k][2], key='gs_input')
+            gs_target = g2.number_input("Target Cost (Rs)", min_value=0.0, value=500.0, step=1.0, key='gs_target')
+            gs_scope = g3.radio("Apply to", ["Current components", "All history entries"], horizontal=True, key='gs_scope')
+            solve = st.form_submit_button("Solve")
+
+        if solve:
+            if gs_scope == "Current components":
+                cases = [(common_inputs, c) for c in all_components_data]
+                labels = [(tool_ref_name, c['name']) for c in all_components_data]
+            else:
+                history_list = load_history_file(COST_HISTORY_FILE)
+                cases = list(history_goal_seek_cases(history_list))
+                labels = [(h['tool_name'], c['name']) for h in history_list for c in h['components_data']]
+
+            gs_rows = []
+            for (tool, comp_name), r in zip(labels, goal_seek_batch(cases, gs_input, gs_target)):
+                gs_rows.append({
+                    "Tool": tool, "Component": comp_name,
+                    "Current": r['current'], "Current Cost": r['current_cost'],
+                    "Required": r['value'], "Achieved Cost": r['achieved_cost'],
+                    "Status": "✅" if r['feasible'] else f"⚠️ {r['note']}",
+                })
+            st.session_state['gs_result'] = {'input': gs_input, 'target': gs_target, 'scope': gs_scope, 'rows': gs_rows}
+
+        res = st.session_state.get('gs_result')
+        if res and res['rows']:
+            st.caption(f"Last solve: {GOAL_SEEK_INPUTS[res['input']][2]} for Rs {res['target']:.2f} ({res['scope'].lower()}). Press Solve again after changing inputs.")
+            st.dataframe(pd.DataFrame(res['rows']), hide_index=True)
+            if GOAL_SEEK_INPUTS[res['input']][1] in ('strokes', 'integer'):
+                st.caption("Stepped input: the required value is the nearest step whose cost stays at or below the target.")
+
 # ==========================================
 # 5. Page: Yield Calculator (Fixed Loading)
 # ==========================================
@@ -641,7 +1345,9 @@ def page_yield_calculator():
         st.session_state.yield_comps.append({'id': new_id, 'outer': 0.0, 'n_count': 1, 'slot_types': 1, 'slots': [{'area':0.0, 'count':1}]})
 
     def remove_yield_comp(idx):
-        st.session_state.yield_comps.pop(idx)
+        comps = st.session_state.yield_comps
+        shift_indexed_keys(YIELD_WIDGET_PREFIXES, idx, len(comps), slot_counts=[len(c.get('slots', [])) for c in comps])
+        comps.pop(idx)
 
     total_finish_area = 0.0
 
@@ -658,9 +1364,7 @@ def page_yield_calculator():
                 key=f"y_n_{idx}",
                 help="Number of cavities/parts produced in a single press stroke."
             )
-            if r1_col2.button("❌", key=f"y_del_{idx}"):
-                remove_yield_comp(idx)
-                st.rerun()
+            r1_col2.button("❌", key=f"y_del_{idx}", on_click=remove_yield_comp, args=(idx,))
 
             comp['outer'] = st.number_input(
                 f"Outer Area (mm²)", 
@@ -718,7 +1422,7 @@ def page_yield_calculator():
             
             st.info(f"**Net Area:** {single_comp_net_area:.2f} mm²  |  **Weight:** {single_comp_weight:.3f} g  |  **Total Area (x{comp['n_count']}):** {total_comp_area:.2f} mm²")
 
-    st.button("➕ Add Another Component", on_click=add_yield_comp)
+    st.button("➕ Add Another Component", on_click=add_yield_comp, disabled=session_over_cap())
 
     # --- 3. Final Calculations ---
     sheet_area = pitch * width
@@ -753,7 +1457,82 @@ def page_yield_calculator():
         st.rerun()
 
 # ==========================================
-# 6. Page: Login & Home
+# 6. Page: Admin
+# ==========================================
+def page_admin():
+    st.title("Admin: Shared Quote Cache")
+    cache = get_quote_cache()
+    stats = cache.snapshot()
+
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Hit Rate", f"{stats['hit_rate'] * 100:.1f} %")
+    m2.metric("Entries", f"{stats['entries']}")
+    m3.metric("Memory", f"{stats['bytes'] / 1024 / 1024:.2f} MB", help=f"Limit: {cache.max_bytes / 1024 / 1024:.0f} MB")
+    m4.metric("TTL", f"{cache.ttl / 60:.0f} min")
+
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Hits", stats['hits'])
+    c2.metric("Misses", stats['misses'])
+    c3.metric("Evictions (LRU)", stats['evictions'])
+    c4.metric("Expirations (TTL)", stats['expirations'])
+    st.caption(f"Counters since {stats['cleared_at']:%d-%b-%Y %H:%M} (last clear)" if stats['cleared_at'] else "Counters since server start")
+    st.caption("A hit is a session's first use of a PDF another session rendered; reruns re-reading the same PDF are not counted.")
+
+    if stats['artifacts']:
+        rows = []
+        for artifact, v in sorted(stats['artifacts'].items()):
+            lookups = v['hits'] + v['misses']
+            rows.append({"Artifact": artifact, "Hits": v['hits'], "Misses": v['misses'],
+                         "Hit Rate (%)": v['hits'] / lookups * 100 if lookups else 0.0})
+        st.table(pd.DataFrame(rows).style.format({"Hit Rate (%)": "{:.1f}"}))
+
+    if st.button("🧹 Clear Cache"):
+        cache.clear()
+        st.rerun()
+
+    st.divider()
+    st.subheader("Material Rate Tables")
+    records = load_rate_table()
+    if records:
+        st.dataframe(pd.DataFrame(records), hide_index=True)
+    else:
+        st.caption("No dated rates yet; quotes fall back to the sidebar values.")
+
+    with st.form("rate_record_form", clear_on_submit=True):
+        f1, f2, f3 = st.columns(3)
+        r_grade = f1.text_input("Grade", value=DEFAULTS['material_grade'])
+        r_thick = f2.number_input("Thickness (mm, 0 = all)", min_value=0.0, value=DEFAULTS['sheet_thickness'], step=0.05)
+        r_from = f3.date_input("Effective From", value=date.today(), format="DD/MM/YYYY")
+        f4, f5, f6 = st.columns(3)
+        r_rm = f4.number_input("RM Rate", value=DEFAULTS['rm_rate'], step=1.0)
+        r_scrap = f5.number_input("Scrap Rate", value=DEFAULTS['scrap_rate'], step=1.0)
+        r_stroke = f6.number_input("Stroke Rate", value=DEFAULTS['stroke_rate'], step=0.05, format="%.2f")
+        if st.form_submit_button("➕ Add Rate"):
+            add_rate_record(r_grade, r_thick or None, r_from, {'rm_rate': r_rm, 'scrap_rate': r_scrap, 'stroke_rate': r_stroke})
+            st.rerun()
+
+    history_list = load_history_file(COST_HISTORY_FILE)
+    if records and history_list:
+        st.markdown("**Saved quotes re-priced at the table rates in effect on their quote date**")
+        repriced = reprice_history(history_list, records=records)
+        st.dataframe(repriced, hide_index=True)
+
+    st.divider()
+    st.subheader("Session Memory")
+    sessions = get_session_gauge().snapshot()
+    s1, s2, s3 = st.columns(3)
+    s1.metric("Active Sessions", len(sessions))
+    s2.metric("Total State", f"{sum(v['bytes'] for v in sessions.values()) / 1024:.1f} KB")
+    s3.metric("Per-Session Cap", f"{SESSION_STATE_MAX_BYTES / 1024:.0f} KB")
+    if sessions:
+        rows = [{"Session": sid[:8], "State (KB)": v['bytes'] / 1024, "Peak (KB)": v['peak_bytes'] / 1024,
+                 "Keys": v['keys'], "Keys Collected": v['collected'],
+                 "Over Cap": "⚠️" if v['bytes'] > SESSION_STATE_MAX_BYTES else ""}
+                for sid, v in sorted(sessions.items(), key=lambda kv: -kv[1]['bytes'])]
+        st.table(pd.DataFrame(rows).style.format({"State (KB)": "{:.1f}", "Peak (KB)": "{:.1f}"}))
+
+# ==========================================
+# 7. Page: Login & Home
 # ==========================================
 def page_login():
     st.title("Login")
@@ -782,18 +1561,19 @@ def page_home():
         """)
 
 # ==========================================
-# 7. Main Router
+# 8. Main Router
 # ==========================================
 def main():
     st.set_page_config(page_title="SPTI Portal", layout="wide", page_icon="🏭")
     
     if 'logged_in' not in st.session_state:
         st.session_state.logged_in = False
+    state_bytes = compact_session_state()
 
     with st.sidebar:
         if os.path.exists(LOGO_FILE): st.image(LOGO_FILE, width=120)
         st.title("Navigation")
-        page = st.radio("Go to", ["Home", "Yield Calculator", "Cost Calculator"])
+        page = st.radio("Go to", ["Home", "Yield Calculator", "Cost Calculator", "Admin"])
         st.markdown("---")
         if st.session_state.logged_in:
             st.write("👤 **Admin Mode**")
@@ -802,6 +1582,9 @@ def main():
                 st.rerun()
         else:
             st.write("👤 Guest Mode")
+        if state_bytes > SESSION_STATE_MAX_BYTES:
+            st.warning(f"Session memory {state_bytes / 1024:.0f} KB is over the {SESSION_STATE_MAX_BYTES / 1024:.0f} KB limit; "
+                       "remove components to add more.")
 
     # --- Routing ---
     if page == "Home":
@@ -818,5 +1601,12 @@ def main():
             st.warning("🔒 This module requires Administrator Access.")
             page_login()
 
+    elif page == "Admin":
+        if st.session_state.logged_in:
+            page_admin()
+        else:
+            st.warning("🔒 This module requires Administrator Access.")
+            page_login()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,230 @@
+# ==========================================
+# Load Test Harness for costing_app.py
+# ==========================================
+# Drives the app headlessly through Streamlit's AppTest API, one AppTest per
+# simulated session, many sessions in parallel. Each scenario seeds a history
+# file of a given size, then every session logs in, opens the Cost Calculator,
+# adds components, edits fields, saves, loads a history entry and waits for
+# both PDF downloads. Runs in a scratch directory so real history is untouched.
+#
+#   python load_test.py --sessions 8 --history 0 50 200 --components 1 5 10
+#
+import argparse
+import json
+import os
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest, app_test, local_script_runner
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_FILE = os.path.join(APP_DIR, 'costing_app.py')
+RUN_TIMEOUT = 60
+PDF_WAIT_TIMEOUT = 60
+
+def allow_parallel_apptests():
+    # AppTest installs a mock Runtime in a process-global slot for each run and clears it
+    # afterwards, so a run overlapping another session's would find no runtime. Fall back
+    # to the most recently installed one instead.
+    original = Runtime.instance.__func__
+    last = {}
+
+    def instance(cls):
+        if cls._instance is not None:
+            last['runtime'] = cls._instance
+            return cls._instance
+        if 'runtime' in last: return last['runtime']
+        return original(cls)
+
+    Runtime.instance = classmethod(instance)
+
+    # AppTest also builds fresh ScriptCaches per run, so every rerun recompiles the script, and
+    # concurrent compile() calls trip "AST constructor recursion depth mismatch" on CPython 3.11.
+    # Share one cache (it locks internally) so the script compiles once, as on a real server.
+    shared_cache = ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: shared_cache
+
+    # Every run reports the same "test session id", which would make simulated sessions share
+    # per-session tracking (PDF job supersession, cache hit counting). Give each AppTest's
+    # session state its own id, stable across that session's runs.
+    runner_init = local_script_runner.LocalScriptRunner.__init__
+    session_ids = {}  # id(state) -> (state, session id); holding state keeps its id() from being reused
+
+    def init(self, *args, **kwargs):
+        runner_init(self, *args, **kwargs)
+        state = self.session_state._state
+        self._session_id = session_ids.setdefault(id(state), (state, uuid.uuid4().hex))[1]
+
+    local_script_runner.LocalScriptRunner.__init__ = init
+
+def rss_mb():
+    with open('/proc/self/statm') as f: pages = int(f.read().split()[1])
+    return pages * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+def process_peak_rss_mb():
+    # Lifetime peak of the whole process, not of any one scenario; ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def seed_history(path, n_entries, n_components):
+    # Synthetic entries shaped like save_cost_state output
+    sys.path.insert(0, APP_DIR)
+    import costing_app as app
+    common_inputs = {k: v for k, v in app.DEFAULTS.items() if not k.startswith('comp_')}
+    comp = {'name': 'Stator', 'stack_height': 33.0, 'single_lam_weight_g': 13.14,
+            'rivet_unit_cost': 0.25, 'rivet_count': 0, 'rivet_manpower_cost': 0.7,
+            'pressing_cost': 1.0, 'opt_name': 'Extra Process', 'opt_cost': 0.0}
+    comps = [app.cost_component(common_inputs, {**comp, 'name': f'Part {i + 1}'}) for i in range(n_components)]
+    history = [{
+        "id": f"seed{i:06d}",
+        "timestamp": "2025-01-01 00:00",
+        "tool_name": f"Load Tool {i}",
+        "common_inputs": {**common_inputs, 'tool_ref_name': f"Load Tool {i}"},
+        "components_data": comps,
+    } for i in range(n_entries)]
+    with open(path, 'w') as f: json.dump(history, f)
+
+class SessionStats:
+    def __init__(self):
+        self.latencies = {}
+        self.errors = []
+
+    def timed_run(self, step, fn):
+        start = time.perf_counter()
+        at = fn()
+        self.latencies.setdefault(step, []).append(time.perf_counter() - start)
+        if at.exception:
+            self.errors.append(f"{step}: {at.exception[0].value}")
+        return at
+
+def find_button(at, label):
+    for b in at.button:
+        if b.label == label: return b
+    raise LookupError(label)
+
+def run_session(session_no, n_components, stats):
+    at = AppTest.from_file(APP_FILE, default_timeout=RUN_TIMEOUT)
+    at.session_state['logged_in'] = True
+    stats.timed_run('open', at.run)
+    stats.timed_run('navigate', lambda: at.sidebar.radio[0].set_value("Cost Calculator").run())
+
+    for _ in range(n_components - 1):
+        stats.timed_run('add_component', lambda: find_button(at, "➕ Add Another Component").click().run())
+    for idx in range(n_components):
+        stats.timed_run('edit_field', lambda: at.number_input(key=f"ht_{idx}").set_value(30.0 + session_no + idx).run())
+    stats.timed_run('edit_field', lambda: at.text_input(key='tool_ref_name').set_value(f"Session {session_no}").run())
+
+    start = time.perf_counter()
+    while len(at.get('download_button')) < 2:
+        if time.perf_counter() - start > PDF_WAIT_TIMEOUT:
+            stats.errors.append("pdf: timed out waiting for downloads")
+            break
+        time.sleep(0.05)
+        stats.timed_run('pdf_poll', at.run)
+    stats.latencies.setdefault('pdf_ready', []).append(time.perf_counter() - start)
+
+    stats.timed_run('save', lambda: find_button(at, "💾 Save Calculation to History").click().run())
+    load_buttons = [b for b in at.sidebar.button if b.key and b.key.startswith('load_')]
+    if load_buttons:
+        stats.timed_run('load_history', lambda: load_buttons[-1].click().run())
+
+def percentile(values, pct):
+    if not values: return 0.0
+    values = sorted(values)
+    k = (len(values) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+def run_scenario(n_sessions, n_history, n_components):
+    seed_history('costing_history.json', n_history, n_components)
+    all_stats = [SessionStats() for _ in range(n_sessions)]
+    rss_samples = []
+    stop = threading.Event()
+
+    def sample_rss():
+        while not stop.is_set():
+            rss_samples.append(rss_mb())
+            stop.wait(0.1)
+
+    start_rss = rss_mb()
+    sampler = threading.Thread(target=sample_rss, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_sessions) as pool:
+        futures = [pool.submit(run_session, i, n_components, s) for i, s in enumerate(all_stats)]
+        for s, f in zip(all_stats, futures):
+            try: f.result()
+            except Exception as e: s.errors.append(f"session: {e!r}")
+    wall = time.perf_counter() - start
+    stop.set()
+    sampler.join()
+    rss_samples.append(rss_mb())
+
+    by_step = {}
+    for s in all_stats:
+        for step, vals in s.latencies.items(): by_step.setdefault(step, []).extend(vals)
+    reruns = [v for step, vals in by_step.items() if step != 'pdf_ready' for v in vals]
+    return {
+        'sessions': n_sessions, 'history': n_history, 'components': n_components,
+        'wall_s': wall,
+        'reruns': len(reruns),
+        'throughput_rps': len(reruns) / wall if wall else 0.0,
+        'latency_ms': {p: percentile(reruns, p) * 1000 for p in (50, 90, 95, 99)},
+        'step_p50_ms': {step: statistics.median(vals) * 1000 for step, vals in by_step.items()},
+        'start_rss_mb': start_rss,
+        'peak_rss_mb': max(rss_samples),  # sampled every 100 ms during this scenario only
+        'errors': [e for s in all_stats for e in s.errors],
+    }
+
+def print_report(results, process_peak):
+    print(f"{'hist':>5} {'comps':>5} {'sess':>4} {'reruns':>6} {'rps':>7} {'p50':>8} {'p90':>8} "
+          f"{'p95':>8} {'p99':>8} {'rss0':>8} {'peak':>8} {'err':>4}")
+    for r in results:
+        lat = r['latency_ms']
+        print(f"{r['history']:>5} {r['components']:>5} {r['sessions']:>4} {r['reruns']:>6} "
+              f"{r['throughput_rps']:>7.1f} {lat[50]:>6.0f}ms {lat[90]:>6.0f}ms {lat[95]:>6.0f}ms "
+              f"{lat[99]:>6.0f}ms {r['start_rss_mb']:>6.0f}MB {r['peak_rss_mb']:>6.0f}MB {len(r['errors']):>4}")
+    print(f"rss0 = RSS at scenario start, peak = sampled peak during the scenario; "
+          f"process lifetime peak (ru_maxrss): {process_peak:.0f}MB")
+    for r in results:
+        for e in sorted(set(r['errors']))[:5]:
+            print(f"  [hist={r['history']} comps={r['components']}] {e}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-session load test for costing_app.py")
+    parser.add_argument('--sessions', type=int, default=8, help="parallel simulated sessions")
+    parser.add_argument('--history', type=int, nargs='+', default=[0, 50, 200], help="seeded history sizes")
+    parser.add_argument('--components', type=int, nargs='+', default=[1, 5, 10], help="components per session")
+    parser.add_argument('--json', help="also write results to this file")
+    args = parser.parse_args()
+
+    json_path = os.path.abspath(args.json) if args.json else None
+    allow_parallel_apptests()
+    workdir = tempfile.mkdtemp(prefix='costing_load_')
+    if os.path.exists(os.path.join(APP_DIR, 'logo.png')):
+        shutil.copy(os.path.join(APP_DIR, 'logo.png'), workdir)
+    os.chdir(workdir)  # history files and logo are resolved relative to the cwd
+    try:
+        results = []
+        for n_history in args.history:
+            for n_components in args.components:
+                results.append(run_scenario(args.sessions, n_history, n_components))
+        process_peak = process_peak_rss_mb()
+        print_report(results, process_peak)
+        if json_path:
+            with open(json_path, 'w') as f:
+                json.dump({'scenarios': results, 'process_peak_rss_mb': process_peak}, f, indent=4)
+    finally:
+        os.chdir(APP_DIR)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()